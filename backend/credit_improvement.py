@@ -1,6 +1,9 @@
 import os
 from typing import Dict, List
 
+# Number of most recent applications used for trend analysis
+TREND_HISTORY_LENGTH = 5
+
 def get_default_suggestions(credit_score: int, user_data: Dict, all_applications: List = None) -> List[Dict[str, str]]:
     """
     Get default credit improvement suggestions based on credit score, current data, and historical trends
@@ -163,7 +166,7 @@ def get_default_suggestions(credit_score: int, user_data: Dict, all_applications
     
     return suggestions
 
-def get_gemini_suggestions(credit_score: int, user_data: Dict, api_key: str, all_applications: List = None) -> List[Dict[str, str]]:
+def get_gemini_suggestions(credit_score: int, user_data: Dict, api_key: str, all_applications: List = None, score_summary: Dict = None) -> List[Dict[str, str]]:
     """
     Get AI-powered credit improvement suggestions using Google Gemini with historical data
     """
@@ -174,11 +177,16 @@ def get_gemini_suggestions(credit_score: int, user_data: Dict, api_key: str, all
         # Build historical context
         historical_context = ""
         if all_applications and len(all_applications) > 1:
-            historical_context = f"\n\nHistorical Data (Last {min(len(all_applications), 5)} Applications):\n"
-            for i, app in enumerate(all_applications[:5]):
+            historical_context = f"\n\nHistorical Data (Last {min(len(all_applications), TREND_HISTORY_LENGTH)} Applications):\n"
+            for i, app in enumerate(all_applications[:TREND_HISTORY_LENGTH]):
                 historical_context += f"Application {i+1}: Credit Score: {app.credit_score}, "
                 historical_context += f"Credit Utilization: {app.credit_utilization_ratio}%, "
                 historical_context += f"Delinquency: {app.delinquency_ratio}%\n"
+        if score_summary and score_summary.get('total_applications', 0) > 1 and score_summary.get('avg_credit_score') is not None:
+            historical_context += f"\nAcross all {score_summary['total_applications']} applications: "
+            historical_context += f"Credit Score min {score_summary['min_credit_score']}, "
+            historical_context += f"max {score_summary['max_credit_score']}, "
+            historical_context += f"average {score_summary['avg_credit_score']:.0f}\n"
         
         prompt = f"""
 You are a financial advisor helping someone improve their credit score.
@@ -229,7 +237,7 @@ Format: [
         # Fallback to default suggestions
         return get_default_suggestions(credit_score, user_data, all_applications)
 
-def get_credit_improvement_suggestions(credit_score: int, user_data: Dict, all_applications: List = None) -> List[Dict[str, str]]:
+def get_credit_improvement_suggestions(credit_score: int, user_data: Dict, all_applications: List = None, score_summary: Dict = None) -> List[Dict[str, str]]:
     """
     Get credit improvement suggestions - uses Gemini if API key is available, 
     otherwise returns default suggestions with historical analysis
@@ -237,6 +245,6 @@ def get_credit_improvement_suggestions(credit_score: int, user_data: Dict, all_a
     api_key = os.getenv('GEMINI_API_KEY')
     
     if api_key and api_key != 'your_gemini_api_key_here':
-        return get_gemini_suggestions(credit_score, user_data, api_key, all_applications)
+        return get_gemini_suggestions(credit_score, user_data, api_key, all_applications, score_summary)
     else:
         return get_default_suggestions(credit_score, user_data, all_applications)
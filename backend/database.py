@@ -1,15 +1,66 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./credit_risk.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./credit_risk.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Async driver to use for each sync URL scheme when ASYNC_DATABASE_URL isn't set
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+}
+
+def async_database_url(url: str) -> str:
+    """Derive the async-driver URL for the async engine from the sync DATABASE_URL"""
+    for scheme, async_scheme in ASYNC_DRIVERS.items():
+        if url.startswith(scheme):
+            return async_scheme + url[len(scheme):]
+    raise RuntimeError(
+        f"No async driver known for DATABASE_URL {url.split('://', 1)[0]}://...; "
+        "set ASYNC_DATABASE_URL to an async-driver URL for the same database"
+    )
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(SQLALCHEMY_DATABASE_URL)
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    engine_options = {"connect_args": {"check_same_thread": False}}
+elif SQLALCHEMY_DATABASE_URL.startswith(("postgresql://", "postgresql+psycopg2://")):
+    # psycopg2: send executemany() parameter sets as multi-row VALUES / batched statements
+    engine_options = {
+        "executemany_mode": "values_plus_batch",
+        "executemany_batch_page_size": 1000,
+        "insertmanyvalues_page_size": 1000
+    }
+else:
+    engine_options = {}
+
+# Compiled SQL cache size, raised from the default 500 so every statement shape stays cached
+QUERY_CACHE_SIZE = 1200
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, query_cache_size=QUERY_CACHE_SIZE, **engine_options)
+
+# Async engine for read-heavy endpoints so DB waits don't tie up threadpool workers
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, query_cache_size=QUERY_CACHE_SIZE)
+
+# SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to per connection
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+if IS_SQLITE:
+    # Only this app's engines; listening on the Engine class would affect every engine in the process
+    for sqlite_engine in (engine, async_engine.sync_engine):
+        event.listen(sqlite_engine, "connect", enable_sqlite_foreign_keys)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,3 +69,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
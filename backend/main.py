@@ -1,44 +1,81 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists, func, extract, case, and_, or_, tuple_
+import base64
+import os
 import re
+import threading
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
-from datetime import datetime
+from cachetools import TTLCache
+from datetime import date, datetime, time, timedelta
 
 # Load environment variables
 load_dotenv()
 
-from database import engine, get_db, Base
+from database import engine, get_db, get_async_db, Base
 from models import Admin, User, LoanApplication
+from migrations import upgrade_schema
 from schemas import (
     SignupRequest, LoginRequest, UserResponse, LoginResponse,
     LoanApplicationRequest, LoanApplicationResponse, PredictionResponse,
     AdminSignupRequest, AdminLoginRequest, AdminResponse, AdminLoginResponse,
-    ApprovalRequest, RejectionRequest
+    ApprovalRequest, RejectionRequest, fast_from_orm
 )
-from prediction_helper import predict
-from credit_improvement import get_credit_improvement_suggestions
+from prediction_helper import predict, warmup
+from credit_improvement import get_credit_improvement_suggestions, TREND_HISTORY_LENGTH
 
-# Create database tables
+# Create database tables, then bring tables from older releases up to date
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 app = FastAPI(title="Credit Risk API", version="1.0.0")
 
-# CORS middleware
+# Short-lived cache for the admin dashboard aggregates; cleared whenever applications or users change
+# cachetools caches aren't thread-safe and this one is shared by async readers and threadpool writers,
+# so every access goes through the helpers below, which hold the lock
+_admin_stats_cache = TTLCache(maxsize=4, ttl=10)
+_admin_stats_lock = threading.Lock()
+
+def get_cached_admin_stats(key: str):
+    """Return the cached admin aggregate for key, or None if missing or expired"""
+    with _admin_stats_lock:
+        return _admin_stats_cache.get(key)
+
+def cache_admin_stats(key: str, value) -> None:
+    """Store an admin aggregate until it expires or the data changes"""
+    with _admin_stats_lock:
+        _admin_stats_cache[key] = value
+
+def clear_admin_stats_cache() -> None:
+    """Drop all cached admin aggregates after a write"""
+    with _admin_stats_lock:
+        _admin_stats_cache.clear()
+
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# CORS middleware - comma-separated allow-list, defaults to the local React dev server
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Update this in production
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["X-Next-Cursor"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 def is_email(identifier: str) -> bool:
     """Check if identifier is an email"""
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(email_pattern, identifier))
+    return _EMAIL_RE.match(identifier) is not None
 
 def is_mobile(identifier: str) -> bool:
     """Check if identifier is a mobile number"""
@@ -48,6 +85,58 @@ def is_aadhar(identifier: str) -> bool:
     """Check if identifier is an aadhar number"""
     return identifier.isdigit() and len(identifier) == 12
 
+def record_exists(db: Session, model, **filters) -> bool:
+    """Check if any row of model matches the given column values, without loading it"""
+    return db.query(
+        exists().where(and_(*[getattr(model, column) == value for column, value in filters.items()]))
+    ).scalar()
+
+def utc_now():
+    """Database-side current time as naive UTC, matching the datetime.utcnow column defaults"""
+    if engine.dialect.name == "postgresql":
+        # now() is timestamptz; convert explicitly so a non-UTC session time zone doesn't leak in
+        return func.timezone("UTC", func.now())
+    return func.now()  # CURRENT_TIMESTAMP, already UTC on SQLite
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Encode the (created_at, id) of the last row on a page as an opaque cursor"""
+    created_at = created_at.isoformat() if created_at is not None else ""
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor back into (created_at, id)"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def newest_first(created_at_column, id_column) -> tuple:
+    """Keyset ordering: newest first, rows without a created_at last, ties broken by id"""
+    return created_at_column.desc().nulls_last(), id_column.desc()
+
+def after_cursor(created_at_column, id_column, cursor: str):
+    """Filter for the rows that follow the cursor in newest_first order"""
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        return and_(created_at_column.is_(None), id_column < row_id)
+    return or_(
+        tuple_(created_at_column, id_column) < tuple_(created_at, row_id),
+        created_at_column.is_(None)
+    )
+
+def take_page(rows: list, limit: Optional[int], response: Response, key) -> list:
+    """Drop the look-ahead row and expose the next page's cursor in the X-Next-Cursor header"""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(*key(rows[-1]))
+    return rows
+
+@app.on_event("startup")
+def warmup_model():
+    """Warm up the prediction model before serving requests"""
+    warmup()
+
 @app.get("/")
 def read_root():
     return {"message": "Credit Risk API is running"}
@@ -57,25 +146,28 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
     """
     Register a new user
     """
-    # Check if email already exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
-    if existing_user:
+    # Check email, mobile number and aadhar uniqueness in one query
+    existing_users = db.query(User.email, User.mobile_number, User.aadhar).filter(
+        or_(
+            User.email == request.email,
+            User.mobile_number == request.mobile_number,
+            User.aadhar == request.aadhar
+        )
+    ).all()
+    
+    if any(u.email == request.email for u in existing_users):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Check if mobile number already exists
-    existing_user = db.query(User).filter(User.mobile_number == request.mobile_number).first()
-    if existing_user:
+    if any(u.mobile_number == request.mobile_number for u in existing_users):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mobile number already registered"
         )
     
-    # Check if aadhar already exists
-    existing_user = db.query(User).filter(User.aadhar == request.aadhar).first()
-    if existing_user:
+    if existing_users:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Aadhar already registered"
@@ -92,6 +184,7 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
     
     db.add(new_user)
     db.commit()
+    clear_admin_stats_cache()
     db.refresh(new_user)
     
     return LoginResponse(
@@ -105,18 +198,14 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     """
     Login with email, mobile number, or aadhar
     """
-    user = None
-    
-    # Try to find user by email first
-    user = db.query(User).filter(User.email == request.identifier).first()
-    
-    # If not found by email, try mobile
-    if not user:
-        user = db.query(User).filter(User.mobile_number == request.identifier).first()
-    
-    # If not found by mobile, try aadhar
-    if not user:
-        user = db.query(User).filter(User.aadhar == request.identifier).first()
+    # Match the identifier against email, mobile and aadhar in one query
+    user = db.query(User).filter(
+        or_(
+            User.email == request.identifier,
+            User.mobile_number == request.identifier,
+            User.aadhar == request.identifier
+        )
+    ).first()
     
     # Check if user exists and password is correct (plain text comparison)
     if not user:
@@ -157,30 +246,15 @@ def apply_for_loan(request: LoanApplicationRequest, user_id: int, db: Session =
     Submit loan application and get credit risk prediction
     """
     # Verify user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    if not record_exists(db, User, id=user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
     # Check if identical application already exists
-    existing_app = db.query(LoanApplication).filter(
-        LoanApplication.user_id == user_id,
-        LoanApplication.age == request.age,
-        LoanApplication.income == request.income,
-        LoanApplication.loan_amount == request.loan_amount,
-        LoanApplication.loan_tenure_months == request.loan_tenure_months,
-        LoanApplication.avg_dpd_per_delinquency == request.avg_dpd_per_delinquency,
-        LoanApplication.delinquency_ratio == request.delinquency_ratio,
-        LoanApplication.credit_utilization_ratio == request.credit_utilization_ratio,
-        LoanApplication.num_open_accounts == request.num_open_accounts,
-        LoanApplication.residence_type == request.residence_type,
-        LoanApplication.loan_purpose == request.loan_purpose,
-        LoanApplication.loan_type == request.loan_type
-    ).first()
-    
-    if existing_app:
+    content_hash = request.content_hash()
+    if record_exists(db, LoanApplication, user_id=user_id, content_hash=content_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Identical application already exists"
@@ -224,6 +298,7 @@ def apply_for_loan(request: LoanApplicationRequest, user_id: int, db: Session =
         residence_type=request.residence_type,
         loan_purpose=request.loan_purpose,
         loan_type=request.loan_type,
+        content_hash=content_hash,
         default_probability=float(default_probability),
         credit_score=int(credit_score),
         rating=rating,
@@ -232,16 +307,14 @@ def apply_for_loan(request: LoanApplicationRequest, user_id: int, db: Session =
     
     db.add(loan_application)
     db.commit()
+    clear_admin_stats_cache()
     db.refresh(loan_application)
     
-    # Calculate loan to income ratio
-    loan_to_income_ratio = request.loan_amount / request.income if request.income > 0 else 0
-    
     return PredictionResponse(
         success=True,
         message="Application submitted successfully. Awaiting admin review.",
         application=LoanApplicationResponse.from_orm(loan_application),
-        loan_to_income_ratio=loan_to_income_ratio
+        loan_to_income_ratio=loan_application.loan_to_income_ratio or 0
     )
 
 @app.get("/api/loan/applications/{user_id}", response_model=list[LoanApplicationResponse])
@@ -249,44 +322,53 @@ def get_user_applications(user_id: int, db: Session = Depends(get_db)):
     """
     Get all loan applications for a user
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    # Load the user and their applications (latest first) in one query
+    user = db.query(User).options(joinedload(User.loan_applications)).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    applications = db.query(LoanApplication).filter(
-        LoanApplication.user_id == user_id
-    ).order_by(LoanApplication.created_at.desc()).all()
-    
-    return [LoanApplicationResponse.from_orm(app) for app in applications]
+    return [fast_from_orm(LoanApplicationResponse, app) for app in user.loan_applications]
 
 @app.get("/api/credit/improvement/{user_id}")
 def get_improvement_suggestions(user_id: int, db: Session = Depends(get_db)):
     """
-    Get credit improvement suggestions for a user based on all historical data
+    Get credit improvement suggestions for a user based on recent applications and a summary of their history
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Get all applications ordered by date (latest first)
-    all_applications = db.query(LoanApplication).filter(
+    # Only the most recent applications are needed for trend analysis (latest first)
+    recent_applications = db.query(LoanApplication).filter(
         LoanApplication.user_id == user_id
-    ).order_by(LoanApplication.created_at.desc()).all()
-    
-    if not all_applications:
+    ).order_by(LoanApplication.created_at.desc()).limit(TREND_HISTORY_LENGTH).all()
+    
+    if not recent_applications:
+        if not record_exists(db, User, id=user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
         return {
             "success": False,
             "message": "No loan application found. Please apply for a loan first.",
             "suggestions": []
         }
     
-    latest_app = all_applications[0]
+    latest_app = recent_applications[0]
+    
+    # Summarise the full history in the database instead of loading every application
+    total_applications, avg_score, min_score, max_score = db.query(
+        func.count(LoanApplication.id),
+        func.avg(LoanApplication.credit_score),
+        func.min(LoanApplication.credit_score),
+        func.max(LoanApplication.credit_score)
+    ).filter(LoanApplication.user_id == user_id).one()
+    score_summary = {
+        "avg_credit_score": avg_score,
+        "min_credit_score": min_score,
+        "max_credit_score": max_score,
+        "total_applications": total_applications
+    }
     
     # Prepare user data
     user_data = {
@@ -304,14 +386,15 @@ def get_improvement_suggestions(user_id: int, db: Session = Depends(get_db)):
     suggestions = get_credit_improvement_suggestions(
         latest_app.credit_score, 
         user_data,
-        all_applications  # Pass all applications for trend analysis
+        recent_applications,  # Pass recent applications for trend analysis
+        score_summary
     )
     
     return {
         "success": True,
         "message": "Credit improvement suggestions generated successfully",
         "credit_score": latest_app.credit_score,
-        "total_applications": len(all_applications),
+        "total_applications": total_applications,
         "suggestions": suggestions
     }
 
@@ -321,16 +404,14 @@ def get_improvement_suggestions(user_id: int, db: Session = Depends(get_db)):
 def admin_signup(request: AdminSignupRequest, db: Session = Depends(get_db)):
     """Create new admin account"""
     # Check if email exists
-    existing_admin = db.query(Admin).filter(Admin.email == request.email).first()
-    if existing_admin:
+    if record_exists(db, Admin, email=request.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Check if mobile exists
-    existing_mobile = db.query(Admin).filter(Admin.mobile_number == request.mobile_number).first()
-    if existing_mobile:
+    if record_exists(db, Admin, mobile_number=request.mobile_number):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mobile number already registered"
@@ -372,46 +453,62 @@ def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db)):
     )
 
 @app.get("/api/admin/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
     """Get KPIs for admin dashboard"""
-    total_users = db.query(User).count()
-    total_applications = db.query(LoanApplication).count()
-    approved_count = db.query(LoanApplication).filter(LoanApplication.status == "Approved").count()
-    rejected_count = db.query(LoanApplication).filter(LoanApplication.status == "Rejected").count()
-    pending_count = db.query(LoanApplication).filter(LoanApplication.status == "Pending").count()
-    
-    total_disbursed = db.query(func.sum(LoanApplication.disbursed_amount)).filter(
-        LoanApplication.status == "Approved"
-    ).scalar() or 0.0
-    
-    total_repaid = db.query(func.sum(LoanApplication.repaid_amount)).filter(
-        LoanApplication.status == "Approved"
-    ).scalar() or 0.0
-    
-    return {
+    cached = get_cached_admin_stats("stats")
+    if cached is not None:
+        return cached
+    
+    total_users = (await db.execute(select(func.count(User.id)))).scalar()
+    
+    # Conditional aggregation: every KPI comes out of a single scan
+    is_approved = LoanApplication.status == "Approved"
+    (
+        total_applications,
+        approved_count,
+        rejected_count,
+        pending_count,
+        total_disbursed,
+        total_repaid
+    ) = (await db.execute(select(
+        func.count(LoanApplication.id),
+        func.sum(case((is_approved, 1), else_=0)),
+        func.sum(case((LoanApplication.status == "Rejected", 1), else_=0)),
+        func.sum(case((LoanApplication.status == "Pending", 1), else_=0)),
+        func.sum(case((is_approved, LoanApplication.disbursed_amount), else_=0)),
+        func.sum(case((is_approved, LoanApplication.repaid_amount), else_=0))
+    ))).one()
+    
+    stats = {
         "total_users": total_users,
         "total_applications": total_applications,
-        "approved_count": approved_count,
-        "rejected_count": rejected_count,
-        "pending_count": pending_count,
-        "total_disbursed": total_disbursed,
-        "total_repaid": total_repaid
+        "approved_count": approved_count or 0,
+        "rejected_count": rejected_count or 0,
+        "pending_count": pending_count or 0,
+        "total_disbursed": total_disbursed or 0.0,
+        "total_repaid": total_repaid or 0.0
     }
+    cache_admin_stats("stats", stats)
+    return stats
 
 @app.get("/api/admin/applications/pending")
-def get_pending_applications(db: Session = Depends(get_db)):
+async def get_pending_applications(db: AsyncSession = Depends(get_async_db)):
     """Get all pending loan applications"""
-    applications = db.query(LoanApplication).filter(
-        LoanApplication.status == "Pending"
-    ).order_by(LoanApplication.created_at.desc()).all()
+    # Fetch applications together with the applicant's name/email in one query
+    rows = (await db.execute(
+        select(LoanApplication, User.full_name, User.email).outerjoin(
+            User, User.id == LoanApplication.user_id
+        ).where(
+            LoanApplication.status == "Pending"
+        ).order_by(LoanApplication.created_at.desc())
+    )).all()
     
     result = []
-    for app in applications:
-        user = db.query(User).filter(User.id == app.user_id).first()
+    for app, user_name, user_email in rows:
         result.append({
-            **LoanApplicationResponse.from_orm(app).dict(),
-            "user_name": user.full_name if user else "Unknown",
-            "user_email": user.email if user else "Unknown"
+            **fast_from_orm(LoanApplicationResponse, app).model_dump(),
+            "user_name": user_name or "Unknown",
+            "user_email": user_email or "Unknown"
         })
     
     return result
@@ -426,12 +523,17 @@ def approve_application(app_id: int, request: ApprovalRequest, admin_id: int, db
     if application.status != "Pending":
         raise HTTPException(status_code=400, detail="Application already processed")
     
+    # approved_by is a foreign key; check it here rather than failing at commit
+    if not record_exists(db, Admin, id=admin_id):
+        raise HTTPException(status_code=404, detail="Admin not found")
+    
     application.status = "Approved"
     application.approved_by = admin_id
-    application.approved_at = datetime.utcnow()
+    application.approved_at = utc_now()  # Assigned by the database at commit
     application.disbursed_amount = request.disbursed_amount or application.loan_amount
     
     db.commit()
+    clear_admin_stats_cache()
     db.refresh(application)
     
     return {"message": "Application approved successfully", "application": LoanApplicationResponse.from_orm(application)}
@@ -446,111 +548,110 @@ def reject_application(app_id: int, request: RejectionRequest, admin_id: int, db
     if application.status != "Pending":
         raise HTTPException(status_code=400, detail="Application already processed")
     
+    # approved_by is a foreign key; check it here rather than failing at commit
+    if not record_exists(db, Admin, id=admin_id):
+        raise HTTPException(status_code=404, detail="Admin not found")
+    
     application.status = "Rejected"
     application.approved_by = admin_id
-    application.approved_at = datetime.utcnow()
+    application.approved_at = utc_now()  # Assigned by the database at commit
     application.rejection_reason = request.rejection_reason
     
     db.commit()
+    clear_admin_stats_cache()
     db.refresh(application)
     
     return {"message": "Application rejected successfully", "application": LoanApplicationResponse.from_orm(application)}
 
 @app.get("/api/admin/applications/history")
-def get_application_history(
+async def get_application_history(
+    response: Response,
     status: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get loan application history with filters"""
-    query = db.query(LoanApplication).filter(LoanApplication.status.in_(["Approved", "Rejected"]))
+    """Get loan application history with filters, newest first (keyset-paginated when limit is given)"""
+    query = select(LoanApplication, User.full_name, User.email).outerjoin(
+        User, User.id == LoanApplication.user_id
+    ).where(LoanApplication.status.in_(["Approved", "Rejected"]))
     
     if status:
-        query = query.filter(LoanApplication.status == status)
+        query = query.where(LoanApplication.status == status)
     
     if start_date:
-        query = query.filter(LoanApplication.created_at >= datetime.fromisoformat(start_date))
+        query = query.where(LoanApplication.created_at >= datetime.combine(start_date, time.min))
     
     if end_date:
-        query = query.filter(LoanApplication.created_at <= datetime.fromisoformat(end_date))
+        # end_date is inclusive of the whole day
+        query = query.where(LoanApplication.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
     
-    applications = query.order_by(LoanApplication.created_at.desc()).all()
+    if search:
+        query = query.where(User.full_name.icontains(search, autoescape=True))
     
-    result = []
-    for app in applications:
-        user = db.query(User).filter(User.id == app.user_id).first()
-        app_dict = {
-            **LoanApplicationResponse.from_orm(app).dict(),
-            "user_name": user.full_name if user else "Unknown",
-            "user_email": user.email if user else "Unknown"
-        }
-        
-        if search and search.lower() not in user.full_name.lower():
-            continue
-            
-        result.append(app_dict)
+    if cursor:
+        query = query.where(after_cursor(LoanApplication.created_at, LoanApplication.id, cursor))
     
-    return result
+    rows = (await db.execute(
+        query.order_by(*newest_first(LoanApplication.created_at, LoanApplication.id)).limit(limit and limit + 1)
+    )).all()
+    rows = take_page(rows, limit, response, lambda row: (row[0].created_at, row[0].id))
+    
+    return [
+        {
+            **fast_from_orm(LoanApplicationResponse, app).model_dump(),
+            "user_name": user_name or "Unknown",
+            "user_email": user_email or "Unknown"
+        }
+        for app, user_name, user_email in rows
+    ]
 
 @app.get("/api/admin/analytics/insights")
-def get_loan_insights(db: Session = Depends(get_db)):
+async def get_loan_insights(db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive loan analytics and insights"""
+    cached = get_cached_admin_stats("insights")
+    if cached is not None:
+        return cached
     
     # Total loans disbursed over time (monthly)
-    monthly_disbursed = db.query(
+    monthly_disbursed = (await db.execute(select(
         extract('year', LoanApplication.approved_at).label('year'),
         extract('month', LoanApplication.approved_at).label('month'),
         func.count(LoanApplication.id).label('count'),
         func.sum(LoanApplication.disbursed_amount).label('total_amount')
-    ).filter(LoanApplication.status == "Approved").group_by('year', 'month').all()
-    
-    # Amount disbursed vs repaid
-    total_disbursed = db.query(func.sum(LoanApplication.disbursed_amount)).filter(
-        LoanApplication.status == "Approved"
-    ).scalar() or 0.0
-    
-    total_repaid = db.query(func.sum(LoanApplication.repaid_amount)).filter(
-        LoanApplication.status == "Approved"
-    ).scalar() or 0.0
-    
-    # Risk distribution
-    low_risk = db.query(LoanApplication).filter(
-        LoanApplication.credit_score >= 750
-    ).count()
-    
-    medium_risk = db.query(LoanApplication).filter(
-        LoanApplication.credit_score >= 500,
-        LoanApplication.credit_score < 750
-    ).count()
-    
-    high_risk = db.query(LoanApplication).filter(
-        LoanApplication.credit_score < 500
-    ).count()
-    
-    # Credit score distribution
-    score_ranges = {
-        "300-400": db.query(LoanApplication).filter(LoanApplication.credit_score >= 300, LoanApplication.credit_score < 400).count(),
-        "400-500": db.query(LoanApplication).filter(LoanApplication.credit_score >= 400, LoanApplication.credit_score < 500).count(),
-        "500-600": db.query(LoanApplication).filter(LoanApplication.credit_score >= 500, LoanApplication.credit_score < 600).count(),
-        "600-700": db.query(LoanApplication).filter(LoanApplication.credit_score >= 600, LoanApplication.credit_score < 700).count(),
-        "700-800": db.query(LoanApplication).filter(LoanApplication.credit_score >= 700, LoanApplication.credit_score < 800).count(),
-        "800-900": db.query(LoanApplication).filter(LoanApplication.credit_score >= 800, LoanApplication.credit_score <= 900).count(),
-    }
-    
-    # Active vs Closed (assuming closed means fully repaid)
-    active_loans = db.query(LoanApplication).filter(
-        LoanApplication.status == "Approved",
-        LoanApplication.repaid_amount < LoanApplication.disbursed_amount
-    ).count()
-    
-    closed_loans = db.query(LoanApplication).filter(
-        LoanApplication.status == "Approved",
-        LoanApplication.repaid_amount >= LoanApplication.disbursed_amount
-    ).count()
-    
-    return {
+    ).where(LoanApplication.status == "Approved").group_by('year', 'month'))).all()
+    
+    # Amount disbursed vs repaid, active vs closed (closed means fully repaid)
+    is_approved = LoanApplication.status == "Approved"
+    total_disbursed, total_repaid, active_loans, closed_loans = (await db.execute(select(
+        func.sum(case((is_approved, LoanApplication.disbursed_amount), else_=0)),
+        func.sum(case((is_approved, LoanApplication.repaid_amount), else_=0)),
+        func.sum(case((and_(is_approved, LoanApplication.repaid_amount < LoanApplication.disbursed_amount), 1), else_=0)),
+        func.sum(case((and_(is_approved, LoanApplication.repaid_amount >= LoanApplication.disbursed_amount), 1), else_=0))
+    ))).one()
+    total_disbursed = total_disbursed or 0.0
+    total_repaid = total_repaid or 0.0
+    
+    # Risk and credit score distribution from the precomputed band columns
+    buckets = (await db.execute(select(
+        LoanApplication.risk_band,
+        LoanApplication.score_band,
+        func.count(LoanApplication.id)
+    ).where(LoanApplication.risk_band.isnot(None)).group_by(
+        LoanApplication.risk_band, LoanApplication.score_band
+    ))).all()
+    
+    risk_distribution = {"low_risk": 0, "medium_risk": 0, "high_risk": 0}
+    score_ranges = dict.fromkeys(["300-400", "400-500", "500-600", "600-700", "700-800", "800-900"], 0)
+    for risk, score_range, count in buckets:
+        risk_distribution[risk] += count
+        if score_range is not None:
+            score_ranges[score_range] += count
+    
+    insights = {
         "monthly_disbursed": [
             {"year": int(m.year), "month": int(m.month), "count": m.count, "amount": m.total_amount}
             for m in monthly_disbursed
@@ -560,29 +661,60 @@ def get_loan_insights(db: Session = Depends(get_db)):
             "total_repaid": total_repaid,
             "outstanding": total_disbursed - total_repaid
         },
-        "risk_distribution": {
-            "low_risk": low_risk,
-            "medium_risk": medium_risk,
-            "high_risk": high_risk
-        },
+        "risk_distribution": risk_distribution,
         "credit_score_distribution": score_ranges,
         "active_vs_closed": {
-            "active": active_loans,
-            "closed": closed_loans
+            "active": active_loans or 0,
+            "closed": closed_loans or 0
         }
     }
+    cache_admin_stats("insights", insights)
+    return insights
 
 @app.get("/api/admin/users", response_model=List[UserResponse])
-def get_all_users(db: Session = Depends(get_db)):
-    """Get all users (Admin only)"""
-    users = db.query(User).all()
-    return [UserResponse.from_orm(user) for user in users]
+def get_all_users(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get all users, newest first; pass limit to page through them with cursor (Admin only)"""
+    # Select only the columns in UserResponse (skips password hashes and ORM hydration)
+    query = db.query(
+        User.id, User.full_name, User.email, User.mobile_number, User.aadhar, User.created_at
+    )
+    if cursor:
+        query = query.filter(after_cursor(User.created_at, User.id, cursor))
+    
+    users = query.order_by(*newest_first(User.created_at, User.id)).limit(limit and limit + 1).all()
+    users = take_page(users, limit, response, lambda user: (user.created_at, user.id))
+    return [user._asdict() for user in users]
 
 @app.get("/api/admin/applications")
-def get_all_applications(db: Session = Depends(get_db)):
-    """Get all loan applications (Admin only)"""
-    applications = db.query(LoanApplication).all()
-    return [LoanApplicationResponse.from_orm(app) for app in applications]
+def get_all_applications(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get all loan applications, newest first; pass limit to page through them with cursor (Admin only)"""
+    # List view only needs a summary of each application
+    query = db.query(
+        LoanApplication.id,
+        LoanApplication.user_id,
+        LoanApplication.status,
+        LoanApplication.credit_score,
+        LoanApplication.loan_amount,
+        LoanApplication.created_at
+    )
+    if cursor:
+        query = query.filter(after_cursor(LoanApplication.created_at, LoanApplication.id, cursor))
+    
+    applications = query.order_by(
+        *newest_first(LoanApplication.created_at, LoanApplication.id)
+    ).limit(limit and limit + 1).all()
+    applications = take_page(applications, limit, response, lambda app: (app.created_at, app.id))
+    return [app._asdict() for app in applications]
 
 @app.put("/api/admin/users/{user_id}")
 def update_user(user_id: int, request: SignupRequest, db: Session = Depends(get_db)):
@@ -613,10 +745,11 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Delete all loan applications for this user
-    db.query(LoanApplication).filter(LoanApplication.user_id == user_id).delete()
+    # Loan applications are removed by the database via ON DELETE CASCADE
+    # (migrations.upgrade_schema adds it to databases created before the FK had it)
     db.delete(user)
     db.commit()
+    clear_admin_stats_cache()
     
     return {"message": "User and associated applications deleted successfully"}
 
@@ -638,6 +771,7 @@ def update_application(app_id: int, request: LoanApplicationRequest, db: Session
     application.delinquency_ratio = request.delinquency_ratio
     application.avg_dpd_per_delinquency = request.avg_dpd_per_delinquency
     application.num_inquiries = request.num_inquiries
+    application.content_hash = request.content_hash()
     
     # Recalculate prediction
     prediction_result = predict(
@@ -659,6 +793,7 @@ def update_application(app_id: int, request: LoanApplicationRequest, db: Session
     application.default_probability = prediction_result['default_probability']
     
     db.commit()
+    clear_admin_stats_cache()
     db.refresh(application)
     
     return {
@@ -675,6 +810,7 @@ def delete_application(app_id: int, db: Session = Depends(get_db)):
     
     db.delete(application)
     db.commit()
+    clear_admin_stats_cache()
     
     return {"message": "Application deleted successfully"}
 
@@ -0,0 +1,98 @@
+"""
+In-place schema upgrades for databases created by an older version of the models.
+Base.metadata.create_all() only creates missing tables, so columns and indexes added
+to an existing table (e.g. the shipped credit_risk.db) are applied here on startup.
+"""
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+from database import engine
+from models import Admin, User, LoanApplication, CONTENT_HASH_FIELDS, application_content_hash, derived_columns
+
+# Columns added to loan_applications after its first release: (name, DDL type)
+LOAN_APPLICATION_COLUMNS = [
+    ("content_hash", "VARCHAR(32)"),
+    ("loan_to_income_ratio", "FLOAT"),
+    ("risk_band", "VARCHAR"),
+    ("score_band", "VARCHAR"),
+]
+
+# Columns derived from the application inputs; backfilled for existing rows when added
+DERIVED_COLUMNS = {"loan_to_income_ratio", "risk_band", "score_band"}
+
+def upgrade_schema():
+    """Add any missing loan_applications columns and indexes; safe to run repeatedly"""
+    inspector = inspect(engine)
+    if not inspector.has_table("loan_applications"):
+        return  # Fresh database: create_all() builds the current schema directly
+    existing_columns = {column["name"] for column in inspector.get_columns("loan_applications")}
+    
+    with engine.begin() as connection:
+        for name, ddl_type in LOAN_APPLICATION_COLUMNS:
+            if name not in existing_columns:
+                connection.execute(text(f"ALTER TABLE loan_applications ADD COLUMN {name} {ddl_type}"))
+        
+        if DERIVED_COLUMNS - existing_columns:
+            rows = connection.execute(text(
+                "SELECT id, loan_amount, income, credit_score FROM loan_applications"
+            )).all()
+            if rows:
+                connection.execute(
+                    text(
+                        "UPDATE loan_applications SET loan_to_income_ratio = :loan_to_income_ratio, "
+                        "risk_band = :risk_band, score_band = :score_band WHERE id = :id"
+                    ),
+                    [{"id": row.id, **derived_columns(row.loan_amount, row.income, row.credit_score)} for row in rows]
+                )
+        
+        # Rows written before content_hash existed (or by older bulk inserts) can't be matched as duplicates
+        rows = connection.execute(text(
+            f"SELECT id, {', '.join(CONTENT_HASH_FIELDS)} FROM loan_applications WHERE content_hash IS NULL"
+        )).mappings().all()
+        if rows:
+            connection.execute(
+                text("UPDATE loan_applications SET content_hash = :content_hash WHERE id = :id"),
+                [{"id": row["id"], "content_hash": application_content_hash(row)} for row in rows]
+            )
+    
+    user_fk = next(fk for fk in inspector.get_foreign_keys("loan_applications") if fk["referred_table"] == "users")
+    if user_fk.get("options", {}).get("ondelete", "").upper() != "CASCADE":
+        cascade_user_deletes(user_fk["name"])
+    
+    for index in LoanApplication.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+def cascade_user_deletes(constraint_name):
+    """Recreate the loan_applications.user_id foreign key with ON DELETE CASCADE"""
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE loan_applications DROP CONSTRAINT {constraint_name}"))
+            connection.execute(text(
+                f"ALTER TABLE loan_applications ADD CONSTRAINT {constraint_name} "
+                "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+            ))
+        return
+    
+    # SQLite can't alter a constraint: copy the rows into a table built from the current model and swap it in.
+    # Its indexes go with the old table and are recreated by upgrade_schema afterwards.
+    metadata = MetaData()
+    for table in (User.__table__, Admin.__table__):
+        table.to_metadata(metadata)  # Lets the copied foreign keys resolve
+    new_table = LoanApplication.__table__.to_metadata(metadata, name="loan_applications_new")
+    columns = ", ".join(column.name for column in new_table.columns)
+    
+    with engine.connect() as connection:
+        # Enforcement has to be off while the table is swapped; the pragma is ignored inside a transaction
+        connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        connection.commit()
+        try:
+            with connection.begin():
+                connection.execute(CreateTable(new_table))
+                connection.execute(text(
+                    f"INSERT INTO loan_applications_new ({columns}) SELECT {columns} FROM loan_applications"
+                ))
+                connection.execute(text("DROP TABLE loan_applications"))
+                connection.execute(text("ALTER TABLE loan_applications_new RENAME TO loan_applications"))
+        finally:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+            connection.commit()
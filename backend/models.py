@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import hashlib
 from database import Base
 
 class Admin(Base):
@@ -28,14 +29,79 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
-    loan_applications = relationship("LoanApplication", back_populates="user")
+    loan_applications = relationship(
+        "LoanApplication",
+        back_populates="user",
+        order_by="LoanApplication.created_at.desc()",
+        cascade="all, delete",
+        passive_deletes=True
+    )
+
+
+# Application inputs fingerprinted by content_hash, in LoanApplicationRequest field order,
+# with the type each value is normalised to (so 500000 and 500000.0 hash the same)
+CONTENT_HASH_FIELDS = {
+    "age": int,
+    "income": float,
+    "loan_amount": float,
+    "loan_tenure_months": int,
+    "avg_dpd_per_delinquency": float,
+    "delinquency_ratio": float,
+    "credit_utilization_ratio": float,
+    "num_open_accounts": int,
+    "residence_type": str,
+    "loan_purpose": str,
+    "loan_type": str
+}
+
+
+def application_content_hash(values):
+    """Fingerprint of the application inputs in values (a mapping), used to detect duplicate submissions"""
+    content = "|".join(str(normalise(values[field])) for field, normalise in CONTENT_HASH_FIELDS.items())
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def derived_columns(loan_amount, income, credit_score):
+    """Compute the stored loan-to-income ratio and risk/score bands for one application"""
+    if credit_score is None:
+        risk_band = None
+    elif credit_score >= 750:
+        risk_band = "low_risk"
+    elif credit_score >= 500:
+        risk_band = "medium_risk"
+    else:
+        risk_band = "high_risk"
+    
+    if credit_score is None or not 300 <= credit_score <= 900:
+        score_band = None
+    else:
+        lower = min(credit_score // 100 * 100, 800)  # 900 belongs to the top band
+        score_band = f"{lower}-{lower + 100}"
+    
+    return {
+        "loan_to_income_ratio": loan_amount / income if loan_amount is not None and income else None,
+        "risk_band": risk_band,
+        "score_band": score_band
+    }
+
+
+def derived_column(context, name):
+    """Column default: derive name from the other values in the INSERT (also covers bulk inserts)"""
+    params = context.get_current_parameters()
+    return derived_columns(params.get("loan_amount"), params.get("income"), params.get("credit_score"))[name]
 
 
 class LoanApplication(Base):
     __tablename__ = "loan_applications"
+    __table_args__ = (
+        Index("ix_loan_user_content_hash", "user_id", "content_hash"),
+        Index("ix_loan_status_created", "status", "created_at"),
+        Index("ix_loan_user_created", "user_id", "created_at"),
+        Index("ix_loan_risk_score_band", "risk_band", "score_band"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Application inputs
     age = Column(Integer, nullable=False)
@@ -49,12 +115,22 @@ class LoanApplication(Base):
     residence_type = Column(String, nullable=False)
     loan_purpose = Column(String, nullable=False)
     loan_type = Column(String, nullable=False)
+    content_hash = Column(  # blake2b of the inputs above, filled in on insert when not given
+        String(32),
+        nullable=True,
+        default=lambda context: application_content_hash(context.get_current_parameters())
+    )
     
     # Prediction results
     default_probability = Column(Float)
     credit_score = Column(Integer)
     rating = Column(String)
     
+    # Derived columns, filled in from the inputs whenever a row is written (see fill_derived_columns)
+    loan_to_income_ratio = Column(Float, default=lambda context: derived_column(context, "loan_to_income_ratio"))
+    risk_band = Column(String, default=lambda context: derived_column(context, "risk_band"))
+    score_band = Column(String, default=lambda context: derived_column(context, "score_band"))
+    
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String, default="Pending")  # Pending, Approved, Rejected
@@ -66,3 +142,13 @@ class LoanApplication(Base):
     
     # Relationship
     user = relationship("User", back_populates="loan_applications")
+
+
+@event.listens_for(LoanApplication, "before_update")
+def fill_derived_columns(mapper, connection, target):
+    """Keep the derived columns and content hash in step when an application's inputs are edited"""
+    for name, value in derived_columns(target.loan_amount, target.income, target.credit_score).items():
+        setattr(target, name, value)
+    target.content_hash = application_content_hash(
+        {field: getattr(target, field) for field in CONTENT_HASH_FIELDS}
+    )
@@ -6,259 +6,271 @@ Run this to create test data for the admin dashboard
 from sqlalchemy.orm import Session
 from database import engine, SessionLocal
 from models import User, LoanApplication, Admin
+from migrations import upgrade_schema
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-import random
+import numpy as np
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# 5 Pending + 8 Approved + 4 Rejected
+SAMPLE_APPLICATION_COUNT = 17
+
+LOAN_TYPES = ["Personal Loan", "Home Loan", "Car Loan", "Business Loan", "Education Loan"]
+RESIDENCE_TYPES = ["Owned", "Rented", "Mortgage"]
+LOAN_PURPOSES = ["Debt Consolidation", "Home Improvement", "Medical", "Education", "Business", "Wedding"]
+REJECTION_REASONS = [
+    "Low credit score below minimum threshold",
+    "Insufficient income for requested loan amount",
+    "High debt-to-income ratio",
+    "Incomplete documentation",
+    "Poor credit history with multiple defaults"
+]
+
+def sample_rating(credit_score):
+    """Determine rating based on credit score"""
+    if credit_score >= 750:
+        return "High"
+    elif credit_score >= 500:
+        return "Medium"
+    else:
+        return "Low"
+
+def draw_applications(rng, n, user_ids, credit_score, age, income, loan_amount, loan_tenure_months,
+                      avg_dpd_per_delinquency, delinquency_ratio, credit_utilization_ratio,
+                      num_open_accounts, default_probability):
+    """
+    Draw the fields for n random loan applications with one vectorised draw per column.
+    Integer ranges are inclusive (low, high) pairs, float ranges are uniform (low, high),
+    and loan_tenure_months is a list of choices.
+    """
+    def integers(bounds):
+        return rng.integers(bounds[0], bounds[1] + 1, size=n).tolist()
+    
+    def uniform(bounds, decimals):
+        return rng.uniform(bounds[0], bounds[1], size=n).round(decimals).tolist()
+    
+    credit_scores = integers(credit_score)
+    columns = {
+        "user_id": rng.choice(user_ids, size=n).tolist(),
+        "age": integers(age),
+        "income": integers(income),
+        "loan_amount": integers(loan_amount),
+        "loan_tenure_months": rng.choice(loan_tenure_months, size=n).tolist(),
+        "avg_dpd_per_delinquency": uniform(avg_dpd_per_delinquency, 2),
+        "delinquency_ratio": uniform(delinquency_ratio, 2),
+        "credit_utilization_ratio": uniform(credit_utilization_ratio, 2),
+        "num_open_accounts": integers(num_open_accounts),
+        "residence_type": rng.choice(RESIDENCE_TYPES, size=n).tolist(),
+        "loan_purpose": rng.choice(LOAN_PURPOSES, size=n).tolist(),
+        "loan_type": rng.choice(LOAN_TYPES, size=n).tolist(),
+        "default_probability": uniform(default_probability, 4),
+        "credit_score": credit_scores,
+        "rating": [sample_rating(score) for score in credit_scores]
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
 def create_sample_data():
-    db = SessionLocal()
+    # The shipped database predates some columns; add them before writing rows
+    upgrade_schema()
+    # Write-only script: nothing is read back after commit, so don't expire loaded objects
+    db = SessionLocal(expire_on_commit=False)
     
     try:
         print("🚀 Starting to populate sample data...")
         
-        # Create admin account if doesn't exist
-        admin = db.query(Admin).filter(Admin.email == "admin@loansewa.com").first()
-        if not admin:
-            admin = Admin(
-                full_name="Admin User",
-                email="admin@loansewa.com",
-                mobile_number="9999999999",
-                password="admin123"  # Plain text as per requirement
-            )
-            db.add(admin)
-            db.commit()
-            print("✅ Admin account created (Email: admin@loansewa.com, Password: admin123)")
+        # Populate everything in one transaction, committed once when the block exits
+        with db.begin():
+            # Skip everything on re-runs: one COUNT plus the admin lookup instead of the full populate
+            if (
+                db.query(LoanApplication).count() >= SAMPLE_APPLICATION_COUNT
+                and db.query(Admin).filter(Admin.email == "admin@loansewa.com").first()
+            ):
+                print("ℹ️  Sample data already populated, nothing to do")
+                return
         
-        # Get existing users or create new ones
-        sample_users = [
-            {
-                "full_name": "Rajesh Kumar",
-                "email": "rajesh.kumar@example.com",
-                "mobile_number": "8876543210",
-                "aadhar": "223456789012"
-            },
-            {
-                "full_name": "Priya Sharma",
-                "email": "priya.sharma@example.com",
-                "mobile_number": "8876543211",
-                "aadhar": "223456789013"
-            },
-            {
-                "full_name": "Amit Patel",
-                "email": "amit.patel@example.com",
-                "mobile_number": "8876543212",
-                "aadhar": "223456789014"
-            },
-            {
-                "full_name": "Sneha Reddy",
-                "email": "sneha.reddy@example.com",
-                "mobile_number": "8876543213",
-                "aadhar": "223456789015"
-            },
-            {
-                "full_name": "Vikram Singh",
-                "email": "vikram.singh@example.com",
-                "mobile_number": "8876543214",
-                "aadhar": "223456789016"
-            },
-            {
-                "full_name": "Ananya Iyer",
-                "email": "ananya.iyer@example.com",
-                "mobile_number": "8876543215",
-                "aadhar": "223456789017"
-            },
-            {
-                "full_name": "Rahul Verma",
-                "email": "rahul.verma@example.com",
-                "mobile_number": "8876543216",
-                "aadhar": "223456789018"
-            },
-            {
-                "full_name": "Kavita Nair",
-                "email": "kavita.nair@example.com",
-                "mobile_number": "8876543217",
-                "aadhar": "223456789019"
+            # Create admin account if doesn't exist
+            admin = db.query(Admin).filter(Admin.email == "admin@loansewa.com").first()
+            if not admin:
+                admin = Admin(
+                    full_name="Admin User",
+                    email="admin@loansewa.com",
+                    mobile_number="9999999999",
+                    password="admin123"  # Plain text as per requirement
+                )
+                db.add(admin)
+                db.flush()  # Assigns admin.id, used as approved_by below
+                print("✅ Admin account created (Email: admin@loansewa.com, Password: admin123)")
+        
+            # Get existing users or create new ones
+            sample_users = [
+                {
+                    "full_name": "Rajesh Kumar",
+                    "email": "rajesh.kumar@example.com",
+                    "mobile_number": "8876543210",
+                    "aadhar": "223456789012"
+                },
+                {
+                    "full_name": "Priya Sharma",
+                    "email": "priya.sharma@example.com",
+                    "mobile_number": "8876543211",
+                    "aadhar": "223456789013"
+                },
+                {
+                    "full_name": "Amit Patel",
+                    "email": "amit.patel@example.com",
+                    "mobile_number": "8876543212",
+                    "aadhar": "223456789014"
+                },
+                {
+                    "full_name": "Sneha Reddy",
+                    "email": "sneha.reddy@example.com",
+                    "mobile_number": "8876543213",
+                    "aadhar": "223456789015"
+                },
+                {
+                    "full_name": "Vikram Singh",
+                    "email": "vikram.singh@example.com",
+                    "mobile_number": "8876543214",
+                    "aadhar": "223456789016"
+                },
+                {
+                    "full_name": "Ananya Iyer",
+                    "email": "ananya.iyer@example.com",
+                    "mobile_number": "8876543215",
+                    "aadhar": "223456789017"
+                },
+                {
+                    "full_name": "Rahul Verma",
+                    "email": "rahul.verma@example.com",
+                    "mobile_number": "8876543216",
+                    "aadhar": "223456789018"
+                },
+                {
+                    "full_name": "Kavita Nair",
+                    "email": "kavita.nair@example.com",
+                    "mobile_number": "8876543217",
+                    "aadhar": "223456789019"
+                }
+            ]
+        
+            users = []
+        
+            # Look up all sample users that already exist in one query
+            existing_users = {
+                user.email: user
+                for user in db.query(User).filter(User.email.in_([u["email"] for u in sample_users])).all()
             }
-        ]
         
-        users = []
-        new_users_count = 0
+            # Every sample user shares the same password, so hash it once (bcrypt is slow by design)
+            sample_password_hash = pwd_context.hash("password123")
         
-        # Try to create new users, if they exist just use them
-        for user_data in sample_users:
-            existing_user = db.query(User).filter(User.email == user_data["email"]).first()
-            if existing_user:
-                users.append(existing_user)
-            else:
-                try:
+            # Create the sample users that don't exist yet, reuse the ones that do
+            new_users = []
+            for user_data in sample_users:
+                existing_user = existing_users.get(user_data["email"])
+                if existing_user:
+                    users.append(existing_user)
+                else:
                     user = User(
                         full_name=user_data["full_name"],
                         email=user_data["email"],
                         mobile_number=user_data["mobile_number"],
                         aadhar=user_data["aadhar"],
-                        hashed_password=pwd_context.hash("password123")
+                        hashed_password=sample_password_hash
                     )
-                    db.add(user)
-                    db.flush()  # Flush to get ID without committing
+                    new_users.append(user)
                     users.append(user)
-                    new_users_count += 1
-                except Exception as e:
-                    db.rollback()
-                    print(f"⚠️  Could not create user {user_data['email']}: {str(e)}")
-                    # Try to find existing user again
-                    existing_user = db.query(User).filter(User.email == user_data["email"]).first()
-                    if existing_user:
-                        users.append(existing_user)
-        
-        # If no users created but some exist, get all existing users
-        if not users:
-            users = db.query(User).limit(10).all()
         
-        db.commit()
+            # Insert all new users with a single flush; IDs are populated from the INSERTs
+            db.add_all(new_users)
+            db.flush()
+            new_users_count = len(new_users)
         
-        if new_users_count > 0:
-            print(f"✅ Created {new_users_count} new sample users")
-        print(f"ℹ️  Using {len(users)} total users for loan applications")
+            # If no users created but some exist, get all existing users
+            if not users:
+                users = db.query(User).limit(10).all()
         
-        # Refresh to get user IDs
-        for user in users:
-            db.refresh(user)
+            if new_users_count > 0:
+                print(f"✅ Created {new_users_count} new sample users")
+            print(f"ℹ️  Using {len(users)} total users for loan applications")
         
-        # Sample loan applications with variety
-        loan_types = ["Personal Loan", "Home Loan", "Car Loan", "Business Loan", "Education Loan"]
-        residence_types = ["Owned", "Rented", "Mortgage"]
-        loan_purposes = ["Debt Consolidation", "Home Improvement", "Medical", "Education", "Business", "Wedding"]
+            # Read the IDs once so drawing applications works with plain ints, not ORM attributes
+            user_ids = [user.id for user in users]
         
-        applications_data = []
+            # Sample loan applications with variety, each column drawn in one vectorised call
+            rng = np.random.default_rng()
+            now = datetime.utcnow()
+            applications_data = []
         
-        # Create 5 PENDING applications (for admin to approve)
-        for i in range(5):
-            user = random.choice(users)
-            credit_score = random.randint(350, 850)
-            
-            # Determine rating based on credit score
-            if credit_score >= 750:
-                rating = "High"
-            elif credit_score >= 500:
-                rating = "Medium"
-            else:
-                rating = "Low"
-            
-            loan_amount = random.randint(50000, 2000000)
-            
-            app = LoanApplication(
-                user_id=user.id,
-                age=random.randint(25, 55),
-                income=random.randint(300000, 2000000),
-                loan_amount=loan_amount,
-                loan_tenure_months=random.choice([12, 24, 36, 48, 60, 84]),
-                avg_dpd_per_delinquency=round(random.uniform(0, 30), 2),
-                delinquency_ratio=round(random.uniform(0, 0.5), 2),
-                credit_utilization_ratio=round(random.uniform(0.1, 0.9), 2),
-                num_open_accounts=random.randint(1, 10),
-                residence_type=random.choice(residence_types),
-                loan_purpose=random.choice(loan_purposes),
-                loan_type=random.choice(loan_types),
-                default_probability=round(random.uniform(0.05, 0.45), 4),
-                credit_score=credit_score,
-                rating=rating,
-                status="Pending",
-                created_at=datetime.utcnow() - timedelta(days=random.randint(1, 15))
+            # Create 5 PENDING applications (for admin to approve)
+            pending = draw_applications(
+                rng, 5, user_ids,
+                credit_score=(350, 850), age=(25, 55), income=(300000, 2000000),
+                loan_amount=(50000, 2000000), loan_tenure_months=[12, 24, 36, 48, 60, 84],
+                avg_dpd_per_delinquency=(0, 30), delinquency_ratio=(0, 0.5),
+                credit_utilization_ratio=(0.1, 0.9), num_open_accounts=(1, 10),
+                default_probability=(0.05, 0.45)
             )
-            applications_data.append(app)
+            created_days = rng.integers(1, 16, size=5).tolist()
+            for fields, created in zip(pending, created_days):
+                applications_data.append(LoanApplication(
+                    **fields,
+                    status="Pending",
+                    created_at=now - timedelta(days=created)
+                ))
         
-        # Create 8 APPROVED applications (with disbursement data)
-        for i in range(8):
-            user = random.choice(users)
-            credit_score = random.randint(600, 850)  # Higher scores for approved
-            
-            if credit_score >= 750:
-                rating = "High"
-            elif credit_score >= 500:
-                rating = "Medium"
-            else:
-                rating = "Low"
-            
-            loan_amount = random.randint(100000, 1500000)
-            disbursed_amount = loan_amount
-            repaid_amount = random.randint(0, int(disbursed_amount * 0.8))
-            
-            app = LoanApplication(
-                user_id=user.id,
-                age=random.randint(25, 55),
-                income=random.randint(400000, 2500000),
-                loan_amount=loan_amount,
-                loan_tenure_months=random.choice([12, 24, 36, 48, 60, 84]),
-                avg_dpd_per_delinquency=round(random.uniform(0, 20), 2),
-                delinquency_ratio=round(random.uniform(0, 0.3), 2),
-                credit_utilization_ratio=round(random.uniform(0.1, 0.7), 2),
-                num_open_accounts=random.randint(2, 8),
-                residence_type=random.choice(residence_types),
-                loan_purpose=random.choice(loan_purposes),
-                loan_type=random.choice(loan_types),
-                default_probability=round(random.uniform(0.05, 0.25), 4),
-                credit_score=credit_score,
-                rating=rating,
-                status="Approved",
-                approved_by=admin.id,
-                approved_at=datetime.utcnow() - timedelta(days=random.randint(5, 60)),
-                disbursed_amount=disbursed_amount,
-                repaid_amount=repaid_amount,
-                created_at=datetime.utcnow() - timedelta(days=random.randint(30, 120))
+            # Create 8 APPROVED applications (with disbursement data)
+            approved = draw_applications(
+                rng, 8, user_ids,
+                credit_score=(600, 850),  # Higher scores for approved
+                age=(25, 55), income=(400000, 2500000),
+                loan_amount=(100000, 1500000), loan_tenure_months=[12, 24, 36, 48, 60, 84],
+                avg_dpd_per_delinquency=(0, 20), delinquency_ratio=(0, 0.3),
+                credit_utilization_ratio=(0.1, 0.7), num_open_accounts=(2, 8),
+                default_probability=(0.05, 0.25)
             )
-            applications_data.append(app)
+            disbursed_amounts = np.array([fields["loan_amount"] for fields in approved])
+            repaid_amounts = rng.integers(0, (disbursed_amounts * 0.8).astype(int) + 1).tolist()
+            approved_days = rng.integers(5, 61, size=8).tolist()
+            created_days = rng.integers(30, 121, size=8).tolist()
+            for fields, repaid, approved_ago, created in zip(approved, repaid_amounts, approved_days, created_days):
+                applications_data.append(LoanApplication(
+                    **fields,
+                    status="Approved",
+                    approved_by=admin.id,
+                    approved_at=now - timedelta(days=approved_ago),
+                    disbursed_amount=fields["loan_amount"],
+                    repaid_amount=repaid,
+                    created_at=now - timedelta(days=created)
+                ))
         
-        # Create 4 REJECTED applications
-        for i in range(4):
-            user = random.choice(users)
-            credit_score = random.randint(300, 600)  # Lower scores for rejected
-            
-            if credit_score >= 750:
-                rating = "High"
-            elif credit_score >= 500:
-                rating = "Medium"
-            else:
-                rating = "Low"
-            
-            rejection_reasons = [
-                "Low credit score below minimum threshold",
-                "Insufficient income for requested loan amount",
-                "High debt-to-income ratio",
-                "Incomplete documentation",
-                "Poor credit history with multiple defaults"
-            ]
-            
-            app = LoanApplication(
-                user_id=user.id,
-                age=random.randint(22, 55),
-                income=random.randint(200000, 800000),
-                loan_amount=random.randint(100000, 2000000),
-                loan_tenure_months=random.choice([12, 24, 36, 48, 60]),
-                avg_dpd_per_delinquency=round(random.uniform(10, 60), 2),
-                delinquency_ratio=round(random.uniform(0.3, 0.8), 2),
-                credit_utilization_ratio=round(random.uniform(0.5, 1.0), 2),
-                num_open_accounts=random.randint(1, 12),
-                residence_type=random.choice(residence_types),
-                loan_purpose=random.choice(loan_purposes),
-                loan_type=random.choice(loan_types),
-                default_probability=round(random.uniform(0.35, 0.75), 4),
-                credit_score=credit_score,
-                rating=rating,
-                status="Rejected",
-                approved_by=admin.id,
-                approved_at=datetime.utcnow() - timedelta(days=random.randint(2, 30)),
-                rejection_reason=random.choice(rejection_reasons),
-                created_at=datetime.utcnow() - timedelta(days=random.randint(20, 90))
+            # Create 4 REJECTED applications
+            rejected = draw_applications(
+                rng, 4, user_ids,
+                credit_score=(300, 600),  # Lower scores for rejected
+                age=(22, 55), income=(200000, 800000),
+                loan_amount=(100000, 2000000), loan_tenure_months=[12, 24, 36, 48, 60],
+                avg_dpd_per_delinquency=(10, 60), delinquency_ratio=(0.3, 0.8),
+                credit_utilization_ratio=(0.5, 1.0), num_open_accounts=(1, 12),
+                default_probability=(0.35, 0.75)
             )
-            applications_data.append(app)
+            reasons = rng.choice(REJECTION_REASONS, size=4).tolist()
+            rejected_days = rng.integers(2, 31, size=4).tolist()
+            created_days = rng.integers(20, 91, size=4).tolist()
+            for fields, reason, rejected_ago, created in zip(rejected, reasons, rejected_days, created_days):
+                applications_data.append(LoanApplication(
+                    **fields,
+                    status="Rejected",
+                    approved_by=admin.id,
+                    approved_at=now - timedelta(days=rejected_ago),
+                    rejection_reason=reason,
+                    created_at=now - timedelta(days=created)
+                ))
         
-        # Add all applications
-        for app in applications_data:
-            db.add(app)
+            # Insert all applications in one batch, bypassing per-object unit-of-work bookkeeping
+            db.bulk_save_objects(applications_data)
         
-        db.commit()
         print(f"✅ Created {len(applications_data)} loan applications")
         print(f"   - 5 Pending (ready for approval)")
         print(f"   - 8 Approved (with disbursement data)")
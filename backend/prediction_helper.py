@@ -1,13 +1,53 @@
 import numpy as np
 import pandas as pd
 import joblib
+import bisect
+import functools
 import os
+import warnings
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the decorated helpers run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# Model input row layout: every feature the model or scaler may ask for, by column position
+MODEL_INPUTS = [
+    'age', 'income', 'loan_amount', 'loan_tenure_months', 'number_of_open_accounts',
+    'credit_utilization_ratio', 'loan_to_income', 'delinquency_ratio', 'avg_dpd_per_delinquency',
+    'residence_type_Owned', 'residence_type_Rented', 'residence_type_Mortgage',
+    'loan_purpose_Education', 'loan_purpose_Home', 'loan_purpose_Personal',
+    'loan_type_Secured', 'loan_type_Unsecured',
+    'number_of_dependants', 'years_at_current_address', 'zipcode', 'sanction_amount',
+    'processing_fee', 'gst', 'net_disbursement', 'principal_outstanding',
+    'bank_balance_at_application', 'number_of_closed_accounts', 'enquiry_count'
+]
+INPUT_INDEX = {name: i for i, name in enumerate(MODEL_INPUTS)}
+
+# Input row with the constant dummy features prefilled; copied per call, then the dynamic fields are patched
+# float64: loan_amount and income are unbounded, and float32 stops representing whole rupees above 2**24
+MODEL_INPUT_TEMPLATE = np.zeros(len(MODEL_INPUTS), dtype=np.float64)
+for name, value in (('number_of_dependants', 2), ('years_at_current_address', 3), ('zipcode', 110001),
+                    ('number_of_closed_accounts', 2), ('enquiry_count', 1)):
+    MODEL_INPUT_TEMPLATE[INPUT_INDEX[name]] = value
+
+# One-hot encodings for the categorical inputs, and the row positions they are written to
+RESIDENCE_ONEHOT = {'Owned': (1, 0, 0), 'Rented': (0, 1, 0), 'Mortgage': (0, 0, 1)}
+# 'Auto' is the dropped baseline category of the drop-first encoding, so it is all zeros
+LOAN_PURPOSE_ONEHOT = {'Auto': (0, 0, 0), 'Education': (1, 0, 0), 'Home': (0, 1, 0), 'Personal': (0, 0, 1)}
+LOAN_TYPE_ONEHOT = {'Secured': (1, 0), 'Unsecured': (0, 1)}
+RESIDENCE_IDX = [INPUT_INDEX[name] for name in ('residence_type_Owned', 'residence_type_Rented', 'residence_type_Mortgage')]
+LOAN_PURPOSE_IDX = [INPUT_INDEX[name] for name in ('loan_purpose_Education', 'loan_purpose_Home', 'loan_purpose_Personal')]
+LOAN_TYPE_IDX = [INPUT_INDEX[name] for name in ('loan_type_Secured', 'loan_type_Unsecured')]
 
 # Load the trained model
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'artifacts', 'model_data.joblib')
 
 try:
-    model_data = joblib.load(MODEL_PATH)
+    # Memory-map the numpy arrays so forked workers (e.g. gunicorn --preload) share the pages
+    model_data = joblib.load(MODEL_PATH, mmap_mode='r')
     model = model_data['model']
     scaler = model_data.get('scaler', None)
     features_list = model_data.get('features', None)
@@ -19,6 +59,10 @@ try:
     if cols_to_scale is not None and hasattr(cols_to_scale, 'tolist'):
         cols_to_scale = cols_to_scale.tolist()
     
+    # Positions of the model features and scaled columns within the input row
+    feature_idx = np.array([INPUT_INDEX[name] for name in features_list])
+    scale_idx = np.array([INPUT_INDEX[name] for name in cols_to_scale]) if cols_to_scale else None
+    
     print(f"✅ Model loaded successfully from {MODEL_PATH}")
     if features_list is not None and len(features_list) > 0:
         print(f"   Expected features ({len(features_list)}): {features_list[:5]}...")
@@ -29,10 +73,8 @@ except Exception as e:
     scaler = None
     features_list = None
     cols_to_scale = None
-    model = None
-    scaler = None
-    features_list = None
-    cols_to_scale = None
+    feature_idx = None
+    scale_idx = None
 
 def prepare_input(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
                     delinquency_ratio, credit_utilization_ratio, num_open_accounts, residence_type,
@@ -55,22 +97,40 @@ def prepare_input(age, income, loan_amount, loan_tenure_months, avg_dpd_per_deli
     return input_data
 
 
-def calculate_credit_score(input_data, base_score=300, scale_length=600):
-    """Calculate credit score based on input parameters"""
+# Rating bands: scores below RATING_BINS[0] are RATINGS[0], and so on up the ladder
+RATING_BINS = (500, 650, 750)
+RATINGS = ('Poor', 'Average', 'Good', 'Excellent')
+RATING_LABELS = np.array(RATINGS)
+
+
+def rating_for_score(credit_score):
+    """Determine rating based on credit score"""
+    return RATINGS[bisect.bisect_right(RATING_BINS, credit_score)]
+
+
+# Small-int codes for the categorical inputs the heuristic looks at (-1 = anything else)
+RESIDENCE_CODES = {'Owned': 0, 'Rented': 1, 'Mortgage': 2}
+LOAN_TYPE_CODES = {'Secured': 0, 'Unsecured': 1}
+
+
+@njit(cache=True)
+def heuristic_credit_score(age, loan_to_income, delinquency_ratio, credit_utilization_ratio,
+                           avg_dpd_per_delinquency, num_open_accounts, residence_code, loan_type_code,
+                           base_score, scale_length):
+    """Numeric core of calculate_credit_score; returns (default probability, credit score)"""
     
     # Risk factors calculation (simplified heuristic)
     risk_score = 0
     
     # Age factor (younger = higher risk)
-    if input_data['age'] < 25:
+    if age < 25:
         risk_score += 15
-    elif input_data['age'] < 35:
+    elif age < 35:
         risk_score += 10
-    elif input_data['age'] < 50:
+    elif age < 50:
         risk_score += 5
     
     # Loan to income ratio (higher = higher risk)
-    loan_to_income = input_data['loan_to_income']
     if loan_to_income > 5:
         risk_score += 25
     elif loan_to_income > 3:
@@ -79,43 +139,43 @@ def calculate_credit_score(input_data, base_score=300, scale_length=600):
         risk_score += 10
     
     # Delinquency ratio (higher = higher risk)
-    if input_data['delinquency_ratio'] > 50:
+    if delinquency_ratio > 50:
         risk_score += 30
-    elif input_data['delinquency_ratio'] > 30:
+    elif delinquency_ratio > 30:
         risk_score += 20
-    elif input_data['delinquency_ratio'] > 10:
+    elif delinquency_ratio > 10:
         risk_score += 10
     
     # Credit utilization (higher = higher risk)
-    if input_data['credit_utilization_ratio'] > 80:
+    if credit_utilization_ratio > 80:
         risk_score += 20
-    elif input_data['credit_utilization_ratio'] > 50:
+    elif credit_utilization_ratio > 50:
         risk_score += 10
-    elif input_data['credit_utilization_ratio'] > 30:
+    elif credit_utilization_ratio > 30:
         risk_score += 5
     
     # Average DPD (higher = higher risk)
-    if input_data['avg_dpd_per_delinquency'] > 30:
+    if avg_dpd_per_delinquency > 30:
         risk_score += 25
-    elif input_data['avg_dpd_per_delinquency'] > 15:
+    elif avg_dpd_per_delinquency > 15:
         risk_score += 15
-    elif input_data['avg_dpd_per_delinquency'] > 5:
+    elif avg_dpd_per_delinquency > 5:
         risk_score += 8
     
     # Number of open accounts
-    if input_data['num_open_accounts'] > 3:
+    if num_open_accounts > 3:
         risk_score += 10
-    elif input_data['num_open_accounts'] < 2:
+    elif num_open_accounts < 2:
         risk_score += 5
     
     # Residence type (Owned = lower risk)
-    if input_data['residence_type'] == 'Rented':
+    if residence_code == 1:
         risk_score += 10
-    elif input_data['residence_type'] == 'Mortgage':
+    elif residence_code == 2:
         risk_score += 5
     
     # Loan type (Unsecured = higher risk)
-    if input_data['loan_type'] == 'Unsecured':
+    if loan_type_code == 1:
         risk_score += 15
     
     # Calculate default probability (0-100 risk score maps to 0-1 probability)
@@ -125,107 +185,186 @@ def calculate_credit_score(input_data, base_score=300, scale_length=600):
     non_default_probability = 1 - default_probability
     credit_score = int(base_score + non_default_probability * scale_length)
     
-    # Determine rating
-    def get_rating(score):
-        if 300 <= score < 500:
-            return 'Poor'
-        elif 500 <= score < 650:
-            return 'Average'
-        elif 650 <= score < 750:
-            return 'Good'
-        elif 750 <= score <= 900:
-            return 'Excellent'
-        else:
-            return 'Undefined'
+    return default_probability, credit_score
+
+
+def calculate_credit_score(input_data, base_score=300, scale_length=600):
+    """Calculate credit score based on input parameters"""
+    default_probability, credit_score = heuristic_credit_score(
+        float(input_data['age']),
+        float(input_data['loan_to_income']),
+        float(input_data['delinquency_ratio']),
+        float(input_data['credit_utilization_ratio']),
+        float(input_data['avg_dpd_per_delinquency']),
+        float(input_data['num_open_accounts']),
+        RESIDENCE_CODES.get(input_data['residence_type'], -1),
+        LOAN_TYPE_CODES.get(input_data['loan_type'], -1),
+        float(base_score),
+        float(scale_length)
+    )
     
-    rating = get_rating(credit_score)
+    # Determine rating
+    rating = rating_for_score(credit_score)
     
     return default_probability, credit_score, rating
 
 
-def predict(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
-            delinquency_ratio, credit_utilization_ratio, num_open_accounts,
-            residence_type, loan_purpose, loan_type):
-    """Main prediction function using trained ML model"""
+# Heuristic risk ladders for batch scoring: (bins, searchsorted side, risk added per bucket).
+# 'right' buckets on "value < bin" thresholds, 'left' on "value > bin" thresholds.
+AGE_RISK = (np.array([25, 35, 50]), 'right', np.array([15, 10, 5, 0]))
+LOAN_TO_INCOME_RISK = (np.array([2, 3, 5]), 'left', np.array([0, 10, 15, 25]))
+DELINQUENCY_RISK = (np.array([10, 30, 50]), 'left', np.array([0, 10, 20, 30]))
+CREDIT_UTILIZATION_RISK = (np.array([30, 50, 80]), 'left', np.array([0, 5, 10, 20]))
+AVG_DPD_RISK = (np.array([5, 15, 30]), 'left', np.array([0, 8, 15, 25]))
+RESIDENCE_TYPE_RISK = {'Rented': 10, 'Mortgage': 5}
+LOAN_TYPE_RISK = {'Unsecured': 15}
+
+
+def calculate_credit_score_batch(df, base_score=300, scale_length=600):
+    """
+    Vectorised calculate_credit_score for many applications at once.
+    df has one row per application with the columns produced by prepare_input.
+    Returns arrays of (default probabilities, credit scores, ratings).
+    """
+    def ladder(values, risk):
+        bins, side, weights = risk
+        return weights[np.searchsorted(bins, values, side=side)]
     
-    # Prepare input
-    input_data = prepare_input(
-        age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
-        delinquency_ratio, credit_utilization_ratio, num_open_accounts,
-        residence_type, loan_purpose, loan_type
+    num_open_accounts = df['num_open_accounts'].to_numpy()
+    risk_score = (
+        ladder(df['age'].to_numpy(), AGE_RISK)
+        + ladder(df['loan_to_income'].to_numpy(), LOAN_TO_INCOME_RISK)
+        + ladder(df['delinquency_ratio'].to_numpy(), DELINQUENCY_RISK)
+        + ladder(df['credit_utilization_ratio'].to_numpy(), CREDIT_UTILIZATION_RISK)
+        + ladder(df['avg_dpd_per_delinquency'].to_numpy(), AVG_DPD_RISK)
+        + np.where(num_open_accounts > 3, 10, np.where(num_open_accounts < 2, 5, 0))
+        + df['residence_type'].map(RESIDENCE_TYPE_RISK).fillna(0).to_numpy()
+        + df['loan_type'].map(LOAN_TYPE_RISK).fillna(0).to_numpy()
     )
     
-    # Use ML model if available
+    default_probability = np.minimum(risk_score / 100, 0.99)
+    credit_score = (base_score + (1 - default_probability) * scale_length).astype(int)
+    rating = RATING_LABELS[np.searchsorted(RATING_BINS, credit_score, side='right')]
+    
+    return default_probability, credit_score, rating
+
+
+def fill_model_features(row, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                        delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                        residence_type, loan_purpose, loan_type):
+    """Write the per-application model input features into a row copied from MODEL_INPUT_TEMPLATE"""
+    row[INPUT_INDEX['age']] = age
+    row[INPUT_INDEX['income']] = income
+    row[INPUT_INDEX['loan_amount']] = loan_amount
+    row[INPUT_INDEX['loan_tenure_months']] = loan_tenure_months
+    row[INPUT_INDEX['number_of_open_accounts']] = num_open_accounts
+    row[INPUT_INDEX['credit_utilization_ratio']] = credit_utilization_ratio
+    row[INPUT_INDEX['loan_to_income']] = loan_amount / income if income > 0 else 0
+    row[INPUT_INDEX['delinquency_ratio']] = delinquency_ratio
+    row[INPUT_INDEX['avg_dpd_per_delinquency']] = avg_dpd_per_delinquency
+    row[RESIDENCE_IDX] = RESIDENCE_ONEHOT.get(residence_type, (0, 0, 0))
+    row[LOAN_PURPOSE_IDX] = LOAN_PURPOSE_ONEHOT.get(loan_purpose, (0, 0, 0))
+    row[LOAN_TYPE_IDX] = LOAN_TYPE_ONEHOT.get(loan_type, (0, 0))
+    # Dummy values for additional features that depend on the application
+    row[INPUT_INDEX['sanction_amount']] = loan_amount
+    row[INPUT_INDEX['processing_fee']] = loan_amount * 0.02
+    row[INPUT_INDEX['gst']] = loan_amount * 0.02 * 0.18
+    row[INPUT_INDEX['net_disbursement']] = loan_amount * 0.98
+    row[INPUT_INDEX['principal_outstanding']] = loan_amount * 0.5
+    row[INPUT_INDEX['bank_balance_at_application']] = income * 0.3
+
+
+@njit(cache=True)
+def credit_scores_from_probabilities(default_probabilities):
+    """Map an array of default probabilities to credit scores (lower probability = higher score)"""
+    credit_scores = np.empty(default_probabilities.shape[0], dtype=np.int64)
+    for i in range(default_probabilities.shape[0]):
+        credit_scores[i] = int(300 + (1 - default_probabilities[i]) * 600)
+    return credit_scores
+
+
+def invalid_categories(application):
+    """List the categorical inputs of one application that the model has no encoding for"""
+    *_, residence_type, loan_purpose, loan_type = application
+    return [
+        f"{field}={value!r}"
+        for field, value, encoding in (
+            ('residence_type', residence_type, RESIDENCE_ONEHOT),
+            ('loan_purpose', loan_purpose, LOAN_PURPOSE_ONEHOT),
+            ('loan_type', loan_type, LOAN_TYPE_ONEHOT)
+        )
+        if value not in encoding
+    ]
+
+
+def predict_batch(applications):
+    """
+    Score many applications with a single model call.
+    Each application is a tuple of predict() arguments in the same order.
+    """
+    # Use ML model if available and every input is one it can encode
     if model is not None and features_list is not None and len(features_list) > 0:
-        try:
-            # Create full feature dictionary with all expected features
-            full_data = {
-                'age': age,
-                'income': income,
-                'loan_amount': loan_amount,
-                'loan_tenure_months': loan_tenure_months,
-                'number_of_open_accounts': num_open_accounts,
-                'credit_utilization_ratio': credit_utilization_ratio,
-                'loan_to_income': loan_amount / income if income > 0 else 0,
-                'delinquency_ratio': delinquency_ratio,
-                'avg_dpd_per_delinquency': avg_dpd_per_delinquency,
-                'residence_type_Owned': 1 if residence_type == 'Owned' else 0,
-                'residence_type_Rented': 1 if residence_type == 'Rented' else 0,
-                'residence_type_Mortgage': 1 if residence_type == 'Mortgage' else 0,
-                'loan_purpose_Education': 1 if loan_purpose == 'Education' else 0,
-                'loan_purpose_Home': 1 if loan_purpose == 'Home' else 0,
-                'loan_purpose_Personal': 1 if loan_purpose == 'Personal' else 0,
-                'loan_type_Secured': 1 if loan_type == 'Secured' else 0,
-                'loan_type_Unsecured': 1 if loan_type == 'Unsecured' else 0,
-                # Dummy values for additional features
-                'number_of_dependants': 2,
-                'years_at_current_address': 3,
-                'zipcode': 110001,
-                'sanction_amount': loan_amount,
-                'processing_fee': loan_amount * 0.02,
-                'gst': loan_amount * 0.02 * 0.18,
-                'net_disbursement': loan_amount * 0.98,
-                'principal_outstanding': loan_amount * 0.5,
-                'bank_balance_at_application': income * 0.3,
-                'number_of_closed_accounts': 2,
-                'enquiry_count': 1
-            }
-            
-            # Create DataFrame
-            df = pd.DataFrame([full_data])
-            
-            # Apply scaling if scaler and cols_to_scale exist
-            if scaler is not None and cols_to_scale is not None and len(cols_to_scale) > 0:
-                df[cols_to_scale] = scaler.transform(df[cols_to_scale])
-            
-            # Select only the features expected by the model
-            features_df = df[features_list]
-            
-            # Get prediction from model
-            default_probability = float(model.predict_proba(features_df)[0][1])
-            
-            # Calculate credit score from probability (inverse relationship)
-            # Lower probability = higher score
-            non_default_probability = 1 - default_probability
-            credit_score = int(300 + non_default_probability * 600)
-            
-            # Determine rating based on credit score
-            if credit_score >= 750:
-                rating = 'Excellent'
-            elif credit_score >= 650:
-                rating = 'Good'
-            elif credit_score >= 500:
-                rating = 'Average'
-            else:
-                rating = 'Poor'
+        invalid = [problem for application in applications for problem in invalid_categories(application)]
+        if invalid:
+            print(f"⚠️ Unsupported model input ({', '.join(invalid)}), using fallback")
+        else:
+            # One input row per application, copied from the template
+            rows = np.tile(MODEL_INPUT_TEMPLATE, (len(applications), 1))
+            for row, application in zip(rows, applications):
+                fill_model_features(row, *application)
             
-            return default_probability, credit_score, rating
+            try:
+                with warnings.catch_warnings():
+                    # The scaler and model were fit on DataFrames; we feed them plain arrays in the same column order
+                    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+                    
+                    # Apply scaling if scaler and cols_to_scale exist
+                    if scaler is not None and scale_idx is not None:
+                        rows[:, scale_idx] = scaler.transform(rows[:, scale_idx])
+                    
+                    # Get predictions from model on only the features it expects
+                    probabilities = np.ascontiguousarray(model.predict_proba(rows[:, feature_idx])[:, 1], dtype=np.float64)
+            except (KeyError, ValueError) as e:
+                print(f"⚠️ Model prediction failed: {e}, using fallback")
+                probabilities = None
             
-        except Exception as e:
-            print(f"⚠️ Model prediction failed: {e}, using fallback")
-            # Fall through to heuristic method
+            if probabilities is not None:
+                credit_scores = credit_scores_from_probabilities(probabilities)
+                return [
+                    (float(p), int(score), rating_for_score(score))
+                    for p, score in zip(probabilities, credit_scores)
+                ]
     
     # Fallback: Calculate credit score using heuristic
-    probability, credit_score, rating = calculate_credit_score(input_data)
+    if len(applications) == 1:
+        return [calculate_credit_score(prepare_input(*applications[0]))]
     
-    return probability, credit_score, rating
+    df = pd.DataFrame([prepare_input(*application) for application in applications])
+    probabilities, credit_scores, ratings = calculate_credit_score_batch(df)
+    return [
+        (float(p), int(score), str(rating))
+        for p, score, rating in zip(probabilities, credit_scores, ratings)
+    ]
+
+
+@functools.lru_cache(maxsize=4096)
+def predict(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+            delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+            residence_type, loan_purpose, loan_type):
+    """
+    Main prediction function using trained ML model.
+    Results are memoised per input; call predict.cache_clear() if the model is reloaded.
+    """
+    return predict_batch([(
+        age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+        delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+        residence_type, loan_purpose, loan_type
+    )])[0]
+
+
+def warmup():
+    """Run one throwaway prediction so the first real request doesn't pay first-call overhead"""
+    # Trigger JIT compilation even when the fallback heuristic is in use
+    credit_scores_from_probabilities(np.zeros(1, dtype=np.float64))
+    calculate_credit_score(prepare_input(30, 500000, 1000000, 36, 0, 0, 30, 2, 'Owned', 'Home', 'Secured'))
+    predict(30, 500000, 1000000, 36, 0, 0, 30, 2, 'Owned', 'Home', 'Secured')
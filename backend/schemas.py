@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime
 from typing import Optional, List
+from models import application_content_hash
 import re
 
 # ============== ADMIN SCHEMAS ==============
@@ -87,6 +88,10 @@ class LoanApplicationRequest(BaseModel):
     loan_purpose: str = Field(..., pattern='^(Education|Home|Auto|Personal)$')
     loan_type: str = Field(..., pattern='^(Secured|Unsecured)$')
 
+    def content_hash(self) -> str:
+        """Fingerprint of the application inputs, used to detect duplicate submissions"""
+        return application_content_hash(self.model_dump())
+
 
 class LoanApplicationResponse(BaseModel):
     id: int
@@ -117,6 +122,11 @@ class LoanApplicationResponse(BaseModel):
         from_attributes = True
 
 
+def fast_from_orm(cls, obj):
+    """Build a response model from a trusted ORM object without re-running validation"""
+    return cls.model_construct(**{field: getattr(obj, field) for field in cls.model_fields})
+
+
 class ApprovalRequest(BaseModel):
     disbursed_amount: Optional[float] = None
 